@@ -1,22 +1,122 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from dataclasses import dataclass
 from datetime import datetime
 import json
 import logging
+import os
 import asyncio
 import random
-from typing import List, AsyncGenerator
+import time
+from collections import deque
+from typing import AsyncGenerator, Dict, Hashable, List, Set, Union
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib codec when orjson isn't installed
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception regardless of which codec is active.
+# json_dumps returns UTF-8 bytes, ready for WebSocket.send_bytes.
+if orjson is not None:
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+else:
+    # One decoder reused for every frame instead of json.loads' per-call
+    # argument handling. Like orjson, non-UTF-8 bytes frames raise
+    # JSONDecodeError so the handlers' plain-text fallback still applies.
+    _json_decode = json.JSONDecoder().decode
+
+    def json_loads(data):
+        if isinstance(data, (bytes, bytearray)):
+            try:
+                data = data.decode("utf-8")
+            except UnicodeDecodeError as e:
+                raise json.JSONDecodeError(f"Invalid UTF-8: {e.reason}", "", e.start) from e
+        return _json_decode(data)
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+try:
+    import simdjson
+except ImportError:  # Command frames are decoded with json_loads instead
+    simdjson = None
+
+# A single parser is reused for every /ws/data command frame; allocating one
+# per message would throw away simdjson's internal buffers each time.
+command_parser = simdjson.Parser() if simdjson is not None else None
+
+def parse_command_action(data: Union[str, bytes]):
+    """Return the "action" field of a data-stream command frame.
+
+    Raises json.JSONDecodeError for malformed frames.
+    """
+    if command_parser is not None:
+        try:
+            doc = command_parser.parse(data)
+        except (ValueError, RuntimeError):
+            # simdjson is only the fast path: malformed frames re-parse below
+            # so the caller gets a JSONDecodeError, and valid JSON it can't
+            # represent (e.g. BIGINT_ERROR for huge integers) still decodes
+            pass
+        else:
+            # Extract the string eagerly: the parser refuses to parse again
+            # while any proxy into the previous document is still alive.
+            # simdjson's get() returns the first of duplicate keys, while
+            # json and orjson keep the last, so scan for the last one.
+            action = None
+            if isinstance(doc, simdjson.Object):
+                for key, value in doc.items():
+                    if key == "action":
+                        action = value
+            del doc
+            return action if isinstance(action, str) else None
+    command = json_loads(data)
+    return command.get("action") if isinstance(command, dict) else None
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+# LOG_LEVEL (e.g. WARNING in production) quiets the per-connection INFO logs.
+# It takes a level name or number; anything else falls back to INFO rather
+# than taking the server down at import.
+def resolve_log_level(value: str) -> Union[int, None]:
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.upper())
+    return level if isinstance(level, int) else None
+
+log_level_setting = os.environ.get("LOG_LEVEL") or "INFO"
+log_level = resolve_log_level(log_level_setting)
+logging.basicConfig(level=logging.INFO if log_level is None else log_level)
 logger = logging.getLogger(__name__)
+if log_level is None:
+    logger.warning("Unknown LOG_LEVEL %r, using INFO", log_level_setting)
+
+# HTML fragment for one sensor reading, filled with %-formatting as
+# (timestamp, temperature, humidity, pressure)
+SENSOR_HTML_TEMPLATE = (
+    '<div class="data-item animate-in slide-in-from-bottom-2 duration-300 mb-2 p-3 bg-white rounded-lg border border-gray-200"><div class="flex flex-col sm:flex-row sm:items-center sm:justify-between"><div class="flex items-center space-x-4 mb-2 sm:mb-0"><div class="w-2 h-2 bg-blue-500 rounded-full"></div><div class="text-sm"><span class="font-medium text-gray-900">SSE Data</span><span class="text-gray-500 ml-2">%s</span></div></div><div class="flex items-center space-x-3 sm:space-x-4 text-xs sm:text-sm"><span class="text-blue-600">🌡️ %.1f°C</span><span class="text-green-600">💧 %.1f%%</span><span class="text-purple-600">📊 %.1f hPa</span></div></div></div>'
+)
+
+# The complete SSE message event for a reading, pre-encoded so the producer
+# builds each frame with a single bytes substitution (PEP 461): the
+# timestamp goes in as ASCII bytes and the readings through %.1f
+SENSOR_EVENT_TEMPLATE = ("event: message\ndata: " + SENSOR_HTML_TEMPLATE + "\n\n").encode()
+
+# Control frames for the SSE stream, likewise complete and pre-encoded;
+# error frames take their (UTF-8 encoded) message through %s
+SSE_CONNECTED_EVENT = b"event: connected\ndata: Connection established\n\n"
+SSE_CLOSE_EVENT = b"event: close\ndata: Connection closed\n\n"
+SSE_ERROR_TEMPLATE = b"event: error\ndata: %s\n\n"
 
-# Pydantic model for sensor data
-class SensorReading(BaseModel):
+# Sensor data record describing one reading. The streaming hot path formats
+# raw values directly; this stays as the schema and a rendering helper.
+@dataclass(slots=True)
+class SensorReading:
     temperature: float  # Celsius
     humidity: float     # Percentage
     pressure: float     # hPa
@@ -24,212 +124,481 @@ class SensorReading(BaseModel):
     
     def to_html(self) -> str:
         """Convert to HTML for SSE transmission"""
-        return f'<div class="data-item animate-in slide-in-from-bottom-2 duration-300 mb-2 p-3 bg-white rounded-lg border border-gray-200"><div class="flex flex-col sm:flex-row sm:items-center sm:justify-between"><div class="flex items-center space-x-4 mb-2 sm:mb-0"><div class="w-2 h-2 bg-blue-500 rounded-full"></div><div class="text-sm"><span class="font-medium text-gray-900">SSE Data</span><span class="text-gray-500 ml-2">{self.timestamp.strftime("%H:%M:%S")}</span></div></div><div class="flex items-center space-x-3 sm:space-x-4 text-xs sm:text-sm"><span class="text-blue-600">🌡️ {self.temperature}°C</span><span class="text-green-600">💧 {self.humidity}%</span><span class="text-purple-600">📊 {self.pressure} hPa</span></div></div></div>'
+        return SENSOR_HTML_TEMPLATE % (
+            self.timestamp.strftime("%H:%M:%S"),
+            self.temperature,
+            self.humidity,
+            self.pressure,
+        )
 
 app = FastAPI()
 
-# Add CORS middleware for cross-origin support
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify actual origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# No global CORS middleware: the pages and WebSockets are same-origin, so the
+# only cross-origin routes (/sse-stream, /sse-health) set their own headers
+# instead of paying for middleware on every request and SSE chunk
+
+try:
+    import numpy as np
+except ImportError:  # Samples are drawn with the random module instead
+    np = None
+
+# Inclusive sensor bounds in tenths of a unit: temperature 18.0-28.0 Celsius,
+# humidity 30.0-80.0 % and pressure 1000.0-1020.0 hPa. Drawing integer tenths
+# and dividing by 10 yields one-decimal readings without calling round().
+SENSOR_RANGES = ((180, 280), (300, 800), (10000, 10200))
+
+# Every value each sensor can report, for picking without numpy
+SENSOR_VALUES = [
+    [tenths / 10 for tenths in range(low, high + 1)]
+    for low, high in SENSOR_RANGES
+]
+
+# Dedicated generator for the pure-Python path, so sampling skips the
+# random module's global-instance lookups
+sample_random = random.Random()
+
+# Readings pre-generated per batch by draw_sensor_samples
+SAMPLE_BUFFER_SIZE = 10000
+
+if np is not None:
+    sample_rng = np.random.default_rng()
+    sample_low, sample_high = np.array(SENSOR_RANGES).T
+
+def draw_sensor_samples(count: int) -> List[List[float]]:
+    """Generate `count` [temperature, humidity, pressure] rows in one batch"""
+    if np is not None:
+        # One vectorized draw replaces 3 * count per-sample calls; tolist()
+        # hands back plain floats ready for formatting and JSON
+        samples = sample_rng.integers(sample_low, sample_high, size=(count, 3), endpoint=True)
+        return (samples / 10).tolist()
+    # Scaling a single random() call picks an index: cheaper than choice(),
+    # which goes through the Python-level _randbelow
+    r = sample_random.random
+    tables = [(values, len(values)) for values in SENSOR_VALUES]
+    return [
+        [values[int(r() * size)] for values, size in tables]
+        for _ in range(count)
+    ]
+
+# Readings buffered per subscriber; once full, the oldest one is dropped
+SSE_QUEUE_SIZE = 32
+DATA_QUEUE_SIZE = 64
+
+# Seconds between readings; one fixed cadence drives every subscriber
+SENSOR_INTERVAL = 1.0
+
+# Queued to an SSE subscriber whose connection was removed (e.g. swept as
+# stale) so its stream ends and the client reconnects, instead of idling
+FEED_CLOSED = object()
+
+# Shared sensor data producer
+class SensorFeed:
+    """Generate each simulated reading once and fan it out to all streams.
+
+    SSE subscribers receive ready-to-send, UTF-8 encoded events (or None
+    when a tick failed); WebSocket subscribers receive the reading as JSON
+    bytes, serialized once per tick for all of them.
+    """
+
+    def __init__(self):
+        # Subscriber queues keyed by SSE connection id / data WebSocket, so
+        # each stream's lifecycle can drop its own subscription
+        self.sse_subscribers: Dict[Hashable, asyncio.Queue] = {}
+        self.ws_subscribers: Dict[Hashable, asyncio.Queue] = {}
+        self.producer_task = None
+        self.samples = []
+        self.sample_index = 0
+
+    def subscribe_sse(self, key: Hashable) -> asyncio.Queue:
+        return self._subscribe(self.sse_subscribers, key, SSE_QUEUE_SIZE)
+
+    def subscribe_ws(self, key: Hashable) -> asyncio.Queue:
+        return self._subscribe(self.ws_subscribers, key, DATA_QUEUE_SIZE)
+
+    def unsubscribe(self, key: Hashable):
+        self.sse_subscribers.pop(key, None)
+        self.ws_subscribers.pop(key, None)
+
+    def close_sse(self, key: Hashable):
+        """Unsubscribe an SSE stream and tell its reader to finish"""
+        queue = self.sse_subscribers.pop(key, None)
+        if queue is not None:
+            # Make room if needed: the close outranks any pending reading
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(FEED_CLOSED)
+
+    def _subscribe(self, subscribers: Dict[Hashable, asyncio.Queue], key: Hashable, maxsize: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=maxsize)
+        subscribers[key] = queue
+        # The producer runs only while someone is listening
+        if self.producer_task is None or self.producer_task.done():
+            self.producer_task = asyncio.create_task(self._produce())
+        return queue
+
+    @staticmethod
+    def _publish(subscribers: Dict[Hashable, asyncio.Queue], item):
+        for queue in subscribers.values():
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Subscriber is behind: readings supersede each other, so
+                # discard its oldest one and keep the latest
+                queue.get_nowait()
+                queue.put_nowait(item)
+
+    def _next_sample(self) -> List[float]:
+        if self.sample_index >= len(self.samples):
+            # A refill costs ~1 ms with numpy (~10 ms without) once per
+            # SAMPLE_BUFFER_SIZE ticks, so it isn't worth pushing off the loop
+            self.samples = draw_sensor_samples(SAMPLE_BUFFER_SIZE)
+            self.sample_index = 0
+        sample = self.samples[self.sample_index]
+        self.sample_index += 1
+        return sample
+
+    async def _produce(self):
+        # Bind everything the loop touches once per tick to locals: the
+        # subscriber dicts are only ever mutated, never rebound
+        sse_subscribers = self.sse_subscribers
+        ws_subscribers = self.ws_subscribers
+        next_sample = self._next_sample
+        publish = self._publish
+        event_template = SENSOR_EVENT_TEMPLATE
+        strftime = time.strftime
+        monotonic = time.monotonic
+        dumps = json_dumps
+        sleep = asyncio.sleep
+        interval = SENSOR_INTERVAL
+        while sse_subscribers or ws_subscribers:
+            try:
+                # Take the next pre-generated sensor sample; the values feed
+                # the templates directly, without a SensorReading per tick
+                temperature, humidity, pressure = next_sample()
+                
+                # Render each format once, only if someone wants it
+                if sse_subscribers:
+                    event = event_template % (
+                        strftime("%H:%M:%S").encode("ascii"),
+                        temperature,
+                        humidity,
+                        pressure,
+                    )
+                    publish(sse_subscribers, event)
+                if ws_subscribers:
+                    publish(ws_subscribers, dumps({
+                        "temperature": temperature,
+                        "humidity": humidity,
+                        "pressure": pressure,
+                        "timestamp": monotonic()
+                    }))
+                
+                await sleep(interval)
+                
+            except Exception as data_error:
+                logger.error("Error generating sensor data: %s", data_error)
+                # Let SSE streams count the failure against their retry budget
+                publish(sse_subscribers, None)
+                
+                # Wait before retrying
+                await sleep(1.0)
+
+sensor_feed = SensorFeed()
 
 # SSE Connection Manager
+# How often abandoned SSE health entries are swept, and how long an entry
+# may go without a ping before it counts as abandoned (seconds)
+HEALTH_SWEEP_INTERVAL = 60.0
+HEALTH_STALE_AFTER = 300.0
+
 class SSEConnectionManager:
     def __init__(self):
         self.active_connections = set()
-        self.connection_health = {}  # Track connection health
+        self.connection_health = {}  # Track connection health (monotonic times)
+        self.sweep_task = None
     
     def add_connection(self, connection_id: str):
         """Add a connection to the active set"""
+        now = time.monotonic()
         self.active_connections.add(connection_id)
         self.connection_health[connection_id] = {
-            'start_time': datetime.now(),
-            'last_ping': datetime.now(),
+            'start_time': now,
+            'last_ping': now,
             'error_count': 0
         }
-        logger.info(f"SSE connection added: {connection_id}")
+        if self.sweep_task is None or self.sweep_task.done():
+            self.sweep_task = asyncio.create_task(self._sweep_stale_connections())
+        logger.info("SSE connection added: %s", connection_id)
     
     def remove_connection(self, connection_id: str):
         """Remove a connection from the active set"""
+        if connection_id not in self.active_connections:
+            return  # Already swept; the stream's own cleanup lands here too
         self.active_connections.discard(connection_id)
         self.connection_health.pop(connection_id, None)
-        logger.info(f"SSE connection removed: {connection_id}")
+        # End a stream that was swept as stale rather than starving it
+        sensor_feed.close_sse(connection_id)
+        logger.info("SSE connection removed: %s", connection_id)
     
     def update_connection_health(self, connection_id: str, error: bool = False):
         """Update connection health status"""
-        if connection_id in self.connection_health:
-            self.connection_health[connection_id]['last_ping'] = datetime.now()
+        health = self.connection_health.get(connection_id)
+        if health is not None:
+            health['last_ping'] = time.monotonic()
             if error:
-                self.connection_health[connection_id]['error_count'] += 1
+                health['error_count'] += 1
     
-    async def generate_data_stream(self, connection_id: str = None) -> AsyncGenerator[str, None]:
-        """Generate simulated sensor data stream with error handling"""
+    async def _sweep_stale_connections(self):
+        """Drop entries for clients that vanished without a clean close"""
+        while self.connection_health:
+            await asyncio.sleep(HEALTH_SWEEP_INTERVAL)
+            cutoff = time.monotonic() - HEALTH_STALE_AFTER
+            stale = [
+                conn_id for conn_id, health in self.connection_health.items()
+                if health['last_ping'] < cutoff
+            ]
+            for conn_id in stale:
+                self.remove_connection(conn_id)
+    
+    async def generate_data_stream(self, connection_id: str = None) -> AsyncGenerator[bytes, None]:
+        """Relay the shared sensor feed to one SSE client with error handling"""
         consecutive_errors = 0
         max_consecutive_errors = 3
+        subscriber_key = connection_id or object()
+        queue = sensor_feed.subscribe_sse(subscriber_key)
+        # Same per-iteration lookup hoisting as SensorFeed._produce
+        get = queue.get
+        update_health = self.update_connection_health
         
         try:
             while True:
-                try:
-                    # Generate simulated sensor data
-                    sensor_data = SensorReading(
-                        temperature=round(random.uniform(18.0, 28.0), 1),
-                        humidity=round(random.uniform(30.0, 80.0), 1),
-                        pressure=round(random.uniform(1000.0, 1020.0), 1),
-                        timestamp=datetime.now()
-                    )
-                    
-                    # Format as SSE event
-                    html_data = sensor_data.to_html()
-                    sse_event = f"event: message\ndata: {html_data}\n\n"
-                    
-                    # Update connection health on successful data generation
-                    if connection_id:
-                        self.update_connection_health(connection_id)
-                    
-                    consecutive_errors = 0  # Reset error counter on success
-                    yield sse_event
-                    
-                    # Wait for random interval between 0.5 and 2 seconds
-                    await asyncio.sleep(random.uniform(0.5, 2.0))
-                    
-                except Exception as data_error:
+                sse_event = await get()
+                
+                if sse_event is FEED_CLOSED:
+                    # The connection was removed under us; close the stream
+                    yield SSE_CLOSE_EVENT
+                    return
+                
+                if sse_event is None:
+                    # The producer failed to generate this reading
                     consecutive_errors += 1
-                    logger.error(f"Error generating sensor data: {data_error}")
                     
                     if connection_id:
-                        self.update_connection_health(connection_id, error=True)
+                        update_health(connection_id, error=True)
                     
                     if consecutive_errors >= max_consecutive_errors:
                         # Send error event to client
-                        error_event = f"event: error\ndata: Data generation failed after {max_consecutive_errors} attempts\n\n"
-                        yield error_event
+                        yield SSE_ERROR_TEMPLATE % (
+                            b"Data generation failed after %d attempts" % max_consecutive_errors
+                        )
                         break
-                    
-                    # Wait before retrying
-                    await asyncio.sleep(1.0)
+                    continue
+                
+                # Update connection health on successful data generation
+                if connection_id:
+                    update_health(connection_id)
+                
+                consecutive_errors = 0  # Reset error counter on success
+                yield sse_event
                 
         except asyncio.CancelledError:
-            logger.info("SSE data stream cancelled")
-            raise
+            raise  # sse_stream logs the cancellation with the connection ID
         except Exception as e:
-            logger.error(f"Critical error in SSE data stream: {e}")
+            logger.error("Critical error in SSE data stream: %s", e)
             # Send final error event
-            error_event = f"event: error\ndata: Critical stream error: {str(e)}\n\n"
-            yield error_event
+            yield SSE_ERROR_TEMPLATE % f"Critical stream error: {e}".encode()
+        finally:
+            sensor_feed.unsubscribe(subscriber_key)
 
 sse_manager = SSEConnectionManager()
 
+# Messages buffered per chat client before it is dropped as too slow
+OUTBOX_SIZE = 256
+
+class Outbox:
+    """Broadcasts waiting to be sent to one chat client.
+
+    A plain deque plus an Event is cheaper than asyncio.Queue for this
+    single-producer, single-consumer case, and lets the writer drain every
+    pending message after a single wakeup.
+    """
+
+    __slots__ = ("messages", "ready")
+
+    def __init__(self):
+        self.messages = deque()
+        self.ready = asyncio.Event()
+
 # Store active WebSocket connections
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        # Each connection maps to its outbox, drained by a dedicated writer
+        # task so one slow client can't hold up delivery to the others
+        self.active_connections: Dict[WebSocket, Outbox] = {}
+        self.writer_tasks: Dict[WebSocket, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        outbox = Outbox()
+        self.active_connections[websocket] = outbox
+        self.writer_tasks[websocket] = asyncio.create_task(self._writer(websocket, outbox))
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.pop(websocket, None)
+        task = self.writer_tasks.pop(websocket, None)
+        if task:
+            task.cancel()
+
+    async def _writer(self, websocket: WebSocket, outbox: Outbox):
+        """Send queued broadcasts to a single client"""
+        messages, ready = outbox.messages, outbox.ready
+        try:
+            while True:
+                await ready.wait()
+                ready.clear()
+                # Popping as we go keeps len(messages) an accurate backlog
+                # for broadcast's slow-client check
+                while messages:
+                    await websocket.send_bytes(messages.popleft())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Error broadcasting to connection: %s", e)
+            self.disconnect(websocket)
+
+    def _evict(self, websocket: WebSocket):
+        """Drop a client whose outbox is full and close its socket"""
+        logger.warning("Dropping chat client that fell behind on broadcasts")
+        self.active_connections.pop(websocket, None)
+        task = self.writer_tasks.get(websocket)
+        if task:
+            task.cancel()
+        # The close task stays referenced until the endpoint sees the
+        # disconnect and calls disconnect()
+        self.writer_tasks[websocket] = asyncio.create_task(self._close(websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)  # Try again later
+        except Exception as e:
+            logger.error("Error closing slow connection: %s", e)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         try:
             await websocket.send_text(message)
         except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
+            logger.error("Error sending personal message: %s", e)
 
-    async def broadcast(self, message: str):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
+    async def broadcast(self, message: Union[str, bytes]):
+        connections = self.active_connections
+        if not connections:
+            return
+        
+        # Encode once and queue the same bytes for every client instead of
+        # letting each send_text re-encode the message; pre-encoded
+        # payloads are queued as-is.
+        payload = message if isinstance(message, bytes) else message.encode("utf-8")
+        # The loop body runs once per client per message, so hoist global
+        # and attribute lookups into locals. The eviction list is only
+        # allocated once a client actually falls behind.
+        limit = OUTBOX_SIZE
+        disconnected = None
+        for connection, outbox in connections.items():
+            messages = outbox.messages
+            if len(messages) >= limit:
+                if disconnected is None:
+                    disconnected = []
                 disconnected.append(connection)
+                continue
+            messages.append(payload)
+            outbox.ready.set()
         
-        # Remove disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn)
+        # Evict clients that can't keep up
+        if disconnected:
+            for conn in disconnected:
+                self._evict(conn)
 
 # Data streaming manager
 class DataStreamManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
         self.streaming_tasks = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        # Cancel streaming task if exists
-        if websocket in self.streaming_tasks:
-            self.streaming_tasks[websocket].cancel()
-            del self.streaming_tasks[websocket]
+        self.active_connections.discard(websocket)
+        self.stop_streaming(websocket)
 
     async def start_streaming(self, websocket: WebSocket):
         if websocket in self.streaming_tasks:
             return  # Already streaming
         
         async def stream_data():
+            queue = sensor_feed.subscribe_ws(websocket)
+            get = queue.get
+            send = websocket.send_bytes
             try:
                 while True:
-                    # Generate simulated sensor data
-                    data = {
-                        "temperature": round(random.uniform(18.0, 28.0), 1),
-                        "humidity": round(random.uniform(30.0, 80.0), 1),
-                        "pressure": round(random.uniform(1000.0, 1020.0), 1),
-                        "timestamp": asyncio.get_event_loop().time()
-                    }
-                    
-                    await websocket.send_text(json.dumps(data))
-                    await asyncio.sleep(random.uniform(0.5, 2.0))  # Random interval
+                    await send(await get())
                     
             except asyncio.CancelledError:
                 pass
             except Exception as e:
-                logger.error(f"Error in streaming task: {e}")
+                logger.error("Error in streaming task: %s", e)
+            finally:
+                sensor_feed.unsubscribe(websocket)
         
         task = asyncio.create_task(stream_data())
         self.streaming_tasks[websocket] = task
 
     def stop_streaming(self, websocket: WebSocket):
-        if websocket in self.streaming_tasks:
-            self.streaming_tasks[websocket].cancel()
-            del self.streaming_tasks[websocket]
+        # Cancel streaming task if exists
+        task = self.streaming_tasks.pop(websocket, None)
+        if task:
+            task.cancel()
 
 manager = ConnectionManager()
 data_manager = DataStreamManager()
 
-templates = Jinja2Templates(directory="templates")
+# Resolved next to this file so importing the app from another working
+# directory still finds the templates
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+templates = Jinja2Templates(directory=TEMPLATES_DIR)
+
+# The pages don't depend on the request, so each one is rendered once at
+# startup and served from memory instead of going through Jinja per GET.
+# Template edits therefore need a restart (--reload-include '*.html' in dev).
+rendered_pages = {
+    name: templates.get_template(name).render().encode()
+    for name in ("index.html", "data_streaming_demo.html", "htmx_sse_demo.html")
+}
 
 @app.get("/", response_class=HTMLResponse)
-async def get_chat_page(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+async def get_chat_page():
+    return HTMLResponse(content=rendered_pages["index.html"])
 
 @app.get("/data-stream", response_class=HTMLResponse)
-async def get_data_stream_page(request: Request):
-    return templates.TemplateResponse("data_streaming_demo.html", {"request": request})
+async def get_data_stream_page():
+    return HTMLResponse(content=rendered_pages["data_streaming_demo.html"])
 
 @app.get("/sse-demo", response_class=HTMLResponse)
-async def get_sse_demo_page(request: Request):
-    return templates.TemplateResponse("htmx_sse_demo.html", {"request": request})
+async def get_sse_demo_page():
+    return HTMLResponse(content=rendered_pages["htmx_sse_demo.html"])
 
 @app.get("/sse-health")
-async def sse_health():
+async def sse_health(response: Response):
     """Health check endpoint for SSE connections"""
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    now = time.monotonic()
     return {
         "active_connections": len(sse_manager.active_connections),
         "connection_details": {
             conn_id: {
-                "uptime_seconds": (datetime.now() - health['start_time']).total_seconds(),
-                "last_ping_seconds_ago": (datetime.now() - health['last_ping']).total_seconds(),
+                "uptime_seconds": now - health['start_time'],
+                "last_ping_seconds_ago": now - health['last_ping'],
                 "error_count": health['error_count']
             }
             for conn_id, health in sse_manager.connection_health.items()
@@ -239,29 +608,28 @@ async def sse_health():
 @app.get("/sse-stream")
 async def sse_stream():
     """SSE endpoint that streams sensor data with enhanced error handling"""
-    import uuid
-    connection_id = str(uuid.uuid4())
+    connection_id = os.urandom(16).hex()
     
     async def event_stream():
         sse_manager.add_connection(connection_id)
         try:
             # Send initial connection confirmation
-            yield "event: connected\ndata: Connection established\n\n"
+            yield SSE_CONNECTED_EVENT
             
             async for event in sse_manager.generate_data_stream(connection_id):
                 yield event
         except asyncio.CancelledError:
-            logger.info(f"SSE stream cancelled for connection: {connection_id}")
+            logger.info("SSE stream cancelled for connection: %s", connection_id)
             # Send close event before terminating
             try:
-                yield "event: close\ndata: Connection closed\n\n"
+                yield SSE_CLOSE_EVENT
             except:
                 pass  # Client may have already disconnected
         except Exception as e:
-            logger.error(f"Error in SSE stream for connection {connection_id}: {e}")
+            logger.error("Error in SSE stream for connection %s: %s", connection_id, e)
             # Send error event to client
             try:
-                yield f"event: error\ndata: Server error occurred: {str(e)}\n\n"
+                yield SSE_ERROR_TEMPLATE % f"Server error occurred: {e}".encode()
             except:
                 pass  # Client may have already disconnected
         finally:
@@ -276,31 +644,50 @@ async def sse_stream():
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "Cache-Control",
             "X-Accel-Buffering": "no",  # Disable nginx buffering
+            # Pin chunked framing so nothing in front of the app can treat
+            # the stream as a sized body; never set Content-Length here
+            "Transfer-Encoding": "chunked",
         }
     )
 
+async def receive_frame(websocket: WebSocket) -> Union[str, bytes]:
+    """Receive the next text or binary frame without decoding it.
+
+    Both JSON decoders accept str and bytes, so binary frames are parsed
+    as-is instead of failing the way receive_text does.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message["bytes"]
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
         while True:
-            data = await websocket.receive_text()
+            data = await receive_frame(websocket)
             
             try:
-                message_data = json.loads(data)
+                message_data = json_loads(data)
                 # Send the raw message data as text for frontend to format
                 response = f'{message_data["user"]}: {message_data["message"]}'
                 await manager.broadcast(response)
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}")
+                # Plain text is an expected fallback, so keep this per-frame
+                # log at DEBUG with lazy formatting
+                logger.debug("Treating non-JSON chat frame as plain text: %s", e)
                 # Handle plain text messages
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8", errors="replace")
                 response = f'Anonymous: {data}'
                 await manager.broadcast(response)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
         manager.disconnect(websocket)
 
 @app.websocket("/ws/data")
@@ -308,19 +695,48 @@ async def data_websocket_endpoint(websocket: WebSocket):
     await data_manager.connect(websocket)
     try:
         while True:
-            data = await websocket.receive_text()
+            data = await receive_frame(websocket)
             
             try:
-                command = json.loads(data)
-                if command.get("action") == "start_stream":
+                action = parse_command_action(data)
+                if action == "start_stream":
                     await data_manager.start_streaming(websocket)
-                elif command.get("action") == "stop_stream":
+                elif action == "stop_stream":
                     data_manager.stop_streaming(websocket)
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error in data endpoint: {e}")
+                logger.debug("JSON decode error in data endpoint: %s", e)
             
     except WebSocketDisconnect:
         data_manager.disconnect(websocket)
     except Exception as e:
-        logger.error(f"Data WebSocket error: {e}")
-        data_manager.disconnect(websocket)
\ No newline at end of file
+        logger.error("Data WebSocket error: %s", e)
+        data_manager.disconnect(websocket)
+
+if __name__ == "__main__":
+    import sys
+    import uvicorn
+    from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+
+    # websockets pauses writers once 64 KiB is buffered on the transport, which
+    # a burst of broadcasts to a busy client reaches quickly. Raise the
+    # high-water mark to 1 MiB before the transport is configured so sends keep
+    # flowing; the per-client outbox still bounds how far a slow client lags.
+    # The uvicorn CLI can't take a protocol class, so only this entry point
+    # gets the larger buffer (see the README).
+    WRITE_BUFFER_HIGH_WATER = 1 << 20
+
+    class HighWaterWebSocketProtocol(WebSocketProtocol):
+        def connection_made(self, transport):
+            self.write_limit = WRITE_BUFFER_HIGH_WATER
+            super().connection_made(transport)
+
+    # Pin the fastest implementation uvicorn offers at each layer: the uvloop
+    # event loop, the httptools HTTP parser and the websockets protocol
+    uvicorn.run(
+        app,
+        host="127.0.0.1",
+        port=8000,
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws=HighWaterWebSocketProtocol,
+    )
@@ -95,6 +95,36 @@ async def test_sse_demo_page():
     except Exception as e:
         print(f"✗ Error testing SSE demo page: {e}")
 
+async def test_data_stream_commands():
+    """Test that unusual but valid command frames still start the data stream"""
+    print("\n4. Testing data stream command parsing...")
+    
+    # Each frame must start streaming: a huge integer the fast parser can't
+    # represent, and a duplicate key where the last "action" wins as in json
+    frames = [
+        ('Big integer field', '{"action":"start_stream","n":123456789012345678901234567890}'),
+        ('Duplicate action key', '{"action":"stop_stream","action":"start_stream"}'),
+    ]
+    
+    try:
+        async with aiohttp.ClientSession() as session:
+            for frame_name, frame in frames:
+                async with session.ws_connect('http://localhost:8000/ws/data') as ws:
+                    await ws.send_str(frame)
+                    try:
+                        msg = await ws.receive(timeout=5)
+                    except asyncio.TimeoutError:
+                        print(f"✗ {frame_name}: no data received")
+                        continue
+                    
+                    if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY) and 'temperature' in json.loads(msg.data):
+                        print(f"✓ {frame_name}: stream started")
+                    else:
+                        print(f"✗ {frame_name}: unexpected message {msg.type}")
+                    
+    except Exception as e:
+        print(f"✗ Error testing data stream commands: {e}")
+
 async def main():
     """Run all tests"""
     print("=== SSE Error Handling Test Suite ===")
@@ -104,11 +134,12 @@ async def main():
     await test_sse_demo_page()
     await test_health_endpoint()
     await test_sse_endpoint()
+    await test_data_stream_commands()
     
     print("\n=== Test Summary ===")
     print("If all tests passed, the error handling implementation is working correctly.")
     print("To test error scenarios manually:")
-    print("1. Start the server: uvicorn main:app --reload")
+    print("1. Start the server: python main.py")
     print("2. Open http://localhost:8000/sse-demo")
     print("3. Try connecting/disconnecting to test error handling")
     print("4. Disconnect your network to test offline handling")